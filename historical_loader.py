@@ -1,102 +1,159 @@
-import io
 import os
 import time
 import contextlib
-from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
 from typing import Optional
 
+import numpy as np
 import pandas as pd
 import requests
 import yfinance as yf
+from requests.adapters import HTTPAdapter
+
+from loader_utils import DEVNULL, as_ticker_columns
+from ticker_loader import fetch_nyse_tickers_symbols_only
 
 try:
     from tqdm.auto import tqdm
 except Exception:  # pragma: no cover - fallback when tqdm is not available
     tqdm = None
 
+_YAHOO_CHART_URL = "https://query2.finance.yahoo.com/v8/finance/chart/{ticker}"
+# Symbols Yahoo has reported as unknown during this process; never worth retrying.
+_delisted_cache: set[str] = set()
+# The delisted probe is advisory, so it gets a short timeout and no retry adapter:
+# an unreachable host costs one timeout per ticker, paid concurrently across a batch.
+_DELISTED_PROBE_TIMEOUT = 5
+_DELISTED_PROBE_WORKERS = 16
+_PROBE_SESSION = requests.Session()
+_PROBE_SESSION.mount("https://", HTTPAdapter(pool_maxsize=_DELISTED_PROBE_WORKERS, max_retries=0))
+
+_PENDING = 0
+_SUCCESS = 1
+_NO_DATA = 2
+_FAILED = 3
+
+
+class _TickerRing:
+    """FIFO of ticker ids backed by a fixed numpy ring buffer.
+
+    Every ticker is queued at most once at a time, so a capacity equal to the
+    number of tickers never overflows.
+    """
+
+    def __init__(self, size: int) -> None:
+        self._buf = np.arange(size, dtype=np.int32)
+        self._head = 0
+        self._count = size
+
+    def __len__(self) -> int:
+        return self._count
+
+    def queued(self) -> np.ndarray:
+        return self._buf[(self._head + np.arange(self._count)) % len(self._buf)]
+
+    def pop_ready(self, n: int, not_before: np.ndarray, now: float) -> np.ndarray:
+        """Pop up to ``n`` ids whose ``not_before`` has passed, keeping the rest in order."""
+        queued = self.queued()
+        ready = np.flatnonzero(not_before[queued] <= now)[:n]
+        rest = np.delete(queued, ready)
+        self._buf[: len(rest)] = rest
+        self._head = 0
+        self._count = len(rest)
+        return queued[ready]
+
+    def push(self, ids: np.ndarray) -> None:
+        idx = (self._head + self._count + np.arange(len(ids))) % len(self._buf)
+        self._buf[idx] = ids
+        self._count += len(ids)
+
 
 def fetch_nyse_tickers(
     limit: Optional[int] = None,
     session: Optional[requests.Session] = None,
     timeout: int = 20,
 ) -> list[str]:
-    client = session or requests
-    response = client.get(
-        "https://www.nasdaqtrader.com/dynamic/SymDir/otherlisted.txt",
-        timeout=timeout,
+    return fetch_nyse_tickers_symbols_only(
+        limit=limit, session=session, timeout=timeout, include_exchanges={"N"}
     )
-    response.raise_for_status()
-    ticker_df = pd.read_csv(io.StringIO(response.text), sep="|")
-
-    nyse = ticker_df[ticker_df["Exchange"] == "N"]["ACT Symbol"].dropna().astype(str).tolist()
-    nyse = [ticker for ticker in nyse if ticker.isalpha() and len(ticker) <= 5]
-    nyse = sorted(set(nyse))
-
-    if limit is not None:
-        return nyse[:limit]
-    return nyse
 
 
 def _extract_yfinance_batch(
     raw: pd.DataFrame, batch: list[str]
 ) -> tuple[pd.DataFrame, set[str], set[str], set[str]]:
     """Return normalized frame and ticker classification for one yfinance batch."""
-    frames: list[pd.DataFrame] = []
-    success: set[str] = set()
-    no_data: set[str] = set()
-    unresolved: set[str] = set()
-
     if raw.empty:
-        return pd.DataFrame(), success, no_data, set(batch)
-
-    if isinstance(raw.columns, pd.MultiIndex):
-        level0 = set(raw.columns.get_level_values(0))
-        index_name = raw.index.name or "index"
-        for ticker in batch:
-            if ticker not in level0:
-                unresolved.add(ticker)
-                continue
-            ticker_df = raw[ticker].dropna(how="all")
-            if ticker_df.empty:
-                no_data.add(ticker)
-            else:
-                success.add(ticker)
-                ticker_out = ticker_df.reset_index().rename(columns={index_name: "Date"})
-                ticker_out["Ticker"] = ticker
-                frames.append(ticker_out)
-    else:
-        ticker = batch[0]
-        ticker_df = raw.dropna(how="all")
-        if ticker_df.empty:
-            no_data.add(ticker)
-        else:
-            success.add(ticker)
-            index_name = raw.index.name or "index"
-            ticker_out = ticker_df.reset_index().rename(columns={index_name: "Date"})
-            ticker_out["Ticker"] = ticker
-            frames.append(ticker_out)
+        return pd.DataFrame(), set(), set(), set(batch)
 
-    if not frames:
+    raw = as_ticker_columns(raw, batch)
+
+    present = set(raw.columns.get_level_values(0))
+    unresolved = set(batch) - present
+
+    combined = raw.stack(level=0, future_stack=True)
+    combined.index.names = ["Date", "Ticker"]
+    combined = combined.reset_index()
+
+    value_cols = [col for col in combined.columns if col not in ("Date", "Ticker")]
+    has_data = combined[value_cols].notna().any(axis=1)
+    per_ticker = has_data.groupby(combined["Ticker"]).any()
+    success = set(per_ticker.index[per_ticker]) & set(batch)
+    no_data = (present & set(batch)) - success
+
+    combined = combined[has_data & combined["Ticker"].isin(success)]
+    if combined.empty:
         return pd.DataFrame(), success, no_data, unresolved
 
-    combined = pd.concat(frames, ignore_index=True)
-    out = pd.DataFrame(
-        {
-            "Date": pd.to_datetime(combined["Date"]).dt.date,
-            "Ticker": combined["Ticker"],
-            "Open": pd.to_numeric(combined.get("Open"), errors="coerce"),
-            "High": pd.to_numeric(combined.get("High"), errors="coerce"),
-            "Low": pd.to_numeric(combined.get("Low"), errors="coerce"),
-            "Close": pd.to_numeric(combined.get("Close"), errors="coerce"),
-            "Volume": pd.to_numeric(combined.get("Volume"), errors="coerce"),
-            "Adj Close": pd.to_numeric(combined.get("Adj Close"), errors="coerce"),
-            "Provider": "yfinance",
-        }
-    )
+    price_cols = ["Open", "High", "Low", "Close", "Adj Close"]
+    out = combined.reindex(
+        columns=["Date", "Ticker", "Open", "High", "Low", "Close", "Volume", "Adj Close"]
+    ).reset_index(drop=True)
+    out["Date"] = pd.to_datetime(out["Date"]).dt.normalize()
+    out["Ticker"] = pd.Categorical(out["Ticker"])
+    # float32 keeps ~7 significant digits, plenty for share prices. Cast explicitly so the
+    # schema does not depend on the price range (downcast= keeps float64 when lossy).
+    out[price_cols] = out[price_cols].apply(pd.to_numeric, errors="coerce").astype("float32")
+    out["Volume"] = pd.to_numeric(out["Volume"], errors="coerce").round().astype("Int64")
+    out["Provider"] = pd.Categorical.from_codes(np.zeros(len(out), dtype=np.int8), categories=["yfinance"])
     return out, success, no_data, unresolved
 
 
+def _is_known_delisted(ticker: str, timeout: float = _DELISTED_PROBE_TIMEOUT) -> bool:
+    """Return True only when Yahoo explicitly reports ``ticker`` as unknown.
+
+    Any other outcome (data, rate limiting, network errors) is treated as
+    inconclusive so the normal no-data retry path still applies. Probes always
+    go through ``_PROBE_SESSION``: a caller's session is meant for nasdaqtrader.
+    """
+    if ticker in _delisted_cache:
+        return True
+    try:
+        response = _PROBE_SESSION.get(
+            _YAHOO_CHART_URL.format(ticker=ticker),
+            params={"range": "1d", "interval": "1d"},
+            timeout=timeout,
+        )
+        if response.status_code != 404:
+            return False
+        error = (response.json().get("chart") or {}).get("error") or {}
+    except (requests.RequestException, ValueError):
+        return False
+    if error.get("code") != "Not Found":
+        return False
+    _delisted_cache.add(ticker)
+    return True
+
+
+def _probe_delisted(tickers: list[str]) -> np.ndarray:
+    """Probe ``tickers`` concurrently and return a mask of the ones Yahoo reports as unknown."""
+    if not tickers:
+        return np.zeros(0, dtype=bool)
+    with ThreadPoolExecutor(max_workers=min(_DELISTED_PROBE_WORKERS, len(tickers))) as executor:
+        results = executor.map(_is_known_delisted, tickers)
+        return np.fromiter(results, dtype=bool, count=len(tickers))
+
+
 def _format_eta(seconds: float) -> str:
     if seconds < 0:
         seconds = 0
@@ -142,23 +199,44 @@ def download_historical_daily_prices(
     end = date.fromisoformat(end_date)
     end_exclusive = end + timedelta(days=1)
     frames = []
-    pending = deque(dict.fromkeys(tickers))
-    total_tickers = len(pending)
+    ticker_table = np.array(list(dict.fromkeys(tickers)), dtype=object)
+    total_tickers = len(ticker_table)
+    attempt_counts = np.zeros(total_tickers, dtype=np.int16)
+    no_data_counts = np.zeros(total_tickers, dtype=np.int16)
+    state = np.full(total_tickers, _PENDING, dtype=np.uint8)
+    not_before = np.full(total_tickers, -np.inf)
+    probed = np.zeros(total_tickers, dtype=bool)
+    pending = _TickerRing(total_tickers)
     finalized = 0
-    attempt_counts = {ticker: 0 for ticker in pending}
-    no_data_counts = {ticker: 0 for ticker in pending}
-    failed_tickers: set[str] = set()
+
+    def schedule_retry(ids: np.ndarray, exponents: np.ndarray) -> None:
+        # Jittered exponential backoff per ticker; other tickers keep flowing meanwhile.
+        backoff = np.minimum(retry_backoff_seconds * 2.0 ** (exponents.astype(float) - 1), 60.0)
+        jitter = np.random.uniform(0.0, 0.5 * retry_backoff_seconds, len(ids))
+        not_before[ids] = time.monotonic() + backoff + jitter
+        pending.push(ids)
+
+    def count_newly_finalized() -> int:
+        # Progress is derived from ``state``; anything no longer pending is finalized.
+        nonlocal finalized
+        previous, finalized = finalized, int((state != _PENDING).sum())
+        return finalized - previous
+
     start_ts = time.time()
     progress_bar = None
     if show_progress and tqdm is not None:
         progress_bar = tqdm(total=total_tickers, desc="Historical download", unit="ticker")
-    devnull_stream = open(os.devnull, "w") if silence_yfinance_output else None
 
     try:
         batch_index = 0
         while pending:
+            now = time.monotonic()
+            batch_ids = pending.pop_ready(batch_size, not_before, now)
+            if not len(batch_ids):
+                time.sleep(min(float(not_before[pending.queued()].min()) - now, 60.0))
+                continue
             batch_index += 1
-            batch = [pending.popleft() for _ in range(min(batch_size, len(pending)))]
+            batch = ticker_table[batch_ids].tolist()
             batch_label = f"batch {batch_index}"
             if show_progress and progress_bar is not None:
                 progress_bar.set_description(f"Historical download ({batch_label})")
@@ -170,19 +248,13 @@ def download_historical_daily_prices(
                     f"finalized {finalized}/{total_tickers} | elapsed {_format_eta(elapsed)}"
                 )
 
+            # yfinance keeps one persistent (cookie/crumb-aware) session per process; Yahoo has no
+            # multi-symbol OHLC endpoint, so batching across symbols stays with yf.download.
             try:
-                if silence_yfinance_output and devnull_stream is not None:
-                    with contextlib.redirect_stdout(devnull_stream), contextlib.redirect_stderr(devnull_stream):
-                        raw = yf.download(
-                            batch,
-                            start=start.isoformat(),
-                            end=end_exclusive.isoformat(),
-                            auto_adjust=False,
-                            progress=False,
-                            group_by="ticker",
-                            threads=yfinance_threads,
-                        )
-                else:
+                with contextlib.ExitStack() as stack:
+                    if silence_yfinance_output:
+                        stack.enter_context(contextlib.redirect_stdout(DEVNULL))
+                        stack.enter_context(contextlib.redirect_stderr(DEVNULL))
                     raw = yf.download(
                         batch,
                         start=start.isoformat(),
@@ -193,44 +265,42 @@ def download_historical_daily_prices(
                         threads=yfinance_threads,
                     )
             except Exception:
-                retry_candidates = set(batch)
-                newly_finalized = 0
-                max_attempt_in_batch = 0
-                for ticker in retry_candidates:
-                    no_data_counts[ticker] = 0
-                    attempt_counts[ticker] += 1
-                    max_attempt_in_batch = max(max_attempt_in_batch, attempt_counts[ticker])
-                    if attempt_counts[ticker] <= max_retries_per_ticker:
-                        pending.append(ticker)
-                    else:
-                        failed_tickers.add(ticker)
-                        newly_finalized += 1
-                finalized += newly_finalized
+                no_data_counts[batch_ids] = 0
+                attempt_counts[batch_ids] += 1
+                exhausted = attempt_counts[batch_ids] > max_retries_per_ticker
+                state[batch_ids[exhausted]] = _FAILED
+                retry_ids = batch_ids[~exhausted]
+                schedule_retry(retry_ids, attempt_counts[retry_ids])
+                newly_finalized = count_newly_finalized()
                 if progress_bar is not None and newly_finalized:
                     progress_bar.update(newly_finalized)
-                if retry_backoff_seconds and retry_candidates:
-                    backoff = retry_backoff_seconds * (2 ** (max_attempt_in_batch - 1))
-                    time.sleep(min(backoff, 60.0))
                 continue
 
             frame, success_tickers, no_data_batch, unresolved = _extract_yfinance_batch(raw, batch)
             if not frame.empty:
                 frames.append(frame)
-            no_data_confirmed: set[str] = set()
-            no_data_retry: set[str] = set()
-
-            for ticker in success_tickers:
-                no_data_counts[ticker] = 0
-
-            for ticker in no_data_batch:
-                no_data_counts[ticker] += 1
-                if no_data_counts[ticker] >= no_data_confirmations:
-                    no_data_confirmed.add(ticker)
-                else:
-                    no_data_retry.add(ticker)
-
-            newly_finalized = len(success_tickers) + len(no_data_confirmed)
-            finalized += newly_finalized
+            # Resolve names back to ids within this batch only.
+            batch_names = ticker_table[batch_ids]
+            success_ids = batch_ids[np.isin(batch_names, list(success_tickers))]
+            no_data_ids = batch_ids[np.isin(batch_names, list(no_data_batch))]
+            unresolved_ids = batch_ids[np.isin(batch_names, list(unresolved))]
+
+            no_data_counts[success_ids] = 0
+            state[success_ids] = _SUCCESS
+
+            no_data_counts[no_data_ids] += 1
+            confirmed = no_data_counts[no_data_ids] >= no_data_confirmations
+            state[no_data_ids[confirmed]] = _NO_DATA
+            no_data_retry = no_data_ids[~confirmed]
+            # Unknown symbols will never return data, so confirm them now instead of retrying.
+            # Each ticker is probed at most once per run; inconclusive answers are not re-asked.
+            to_probe = no_data_retry[~probed[no_data_retry]]
+            probed[to_probe] = True
+            delisted_ids = to_probe[_probe_delisted(ticker_table[to_probe].tolist())]
+            state[delisted_ids] = _NO_DATA
+            no_data_retry = no_data_retry[~np.isin(no_data_retry, delisted_ids)]
+
+            newly_finalized = count_newly_finalized()
             elapsed = time.time() - start_ts
             avg_per_ticker = elapsed / finalized if finalized else 0
             eta_seconds = avg_per_ticker * (total_tickers - finalized)
@@ -247,35 +317,25 @@ def download_historical_daily_prices(
                     f"elapsed {_format_eta(elapsed)} | ETA {_format_eta(eta_seconds)}"
                 )
 
-            max_attempt_in_batch = 0
-            for ticker in no_data_retry:
-                pending.append(ticker)
-                max_attempt_in_batch = max(max_attempt_in_batch, no_data_counts[ticker])
-
-            for ticker in unresolved:
-                no_data_counts[ticker] = 0
-                attempt_counts[ticker] += 1
-                max_attempt_in_batch = max(max_attempt_in_batch, attempt_counts[ticker])
-                if attempt_counts[ticker] <= max_retries_per_ticker:
-                    pending.append(ticker)
-                else:
-                    failed_tickers.add(ticker)
-                    finalized += 1
-                    if progress_bar is not None:
-                        progress_bar.update(1)
-
-            if retry_backoff_seconds and (unresolved or no_data_retry):
-                backoff = retry_backoff_seconds * (2 ** (max_attempt_in_batch - 1))
-                time.sleep(min(backoff, 60.0))
-            elif delay_seconds and pending:
+            schedule_retry(no_data_retry, no_data_counts[no_data_retry])
+
+            no_data_counts[unresolved_ids] = 0
+            attempt_counts[unresolved_ids] += 1
+            exhausted = attempt_counts[unresolved_ids] > max_retries_per_ticker
+            state[unresolved_ids[exhausted]] = _FAILED
+            retry_ids = unresolved_ids[~exhausted]
+            schedule_retry(retry_ids, attempt_counts[retry_ids])
+            newly_failed = count_newly_finalized()
+            if progress_bar is not None and newly_failed:
+                progress_bar.update(newly_failed)
+
+            if delay_seconds and pending:
                 time.sleep(delay_seconds)
     finally:
-        if devnull_stream is not None:
-            devnull_stream.close()
-
-    if progress_bar is not None:
-        progress_bar.close()
+        if progress_bar is not None:
+            progress_bar.close()
 
+    failed_tickers = ticker_table[state == _FAILED].tolist()
     if failed_tickers:
         failed_sample = ", ".join(sorted(failed_tickers)[:20])
         raise RuntimeError(
@@ -286,7 +346,10 @@ def download_historical_daily_prices(
         raise RuntimeError("No historical price data returned from yfinance")
 
     combined = pd.concat(frames, ignore_index=True)
-    combined["Date"] = pd.to_datetime(combined["Date"]).dt.date
+    # Drop the per-batch frames before dedup/sort so they don't stack on top of the copies.
+    frames.clear()
+    # Batches carry different Ticker categories, so concat falls back to strings; re-encode once.
+    combined["Ticker"] = combined["Ticker"].astype("category")
     combined = combined.drop_duplicates(subset=["Ticker", "Date"], keep="last")
     combined = combined.sort_values(["Ticker", "Date"]).reset_index(drop=True)
 
@@ -295,7 +358,13 @@ def download_historical_daily_prices(
 
     if individual_dir:
         os.makedirs(individual_dir, exist_ok=True)
-        for ticker, group in combined.groupby("Ticker"):
+
+        def write_ticker_csv(item: tuple[str, pd.DataFrame]) -> None:
+            ticker, group = item
             group.to_csv(os.path.join(individual_dir, f"{ticker}.csv"), index=False)
 
+        # Already sorted by Ticker, so skip groupby's own sort.
+        with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as executor:
+            list(executor.map(write_ticker_csv, combined.groupby("Ticker", sort=False, observed=True)))
+
     return combined
@@ -1,23 +1,37 @@
 import os
 import time
+import threading
 import contextlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
-from typing import Optional
+from typing import Callable, Optional
 import io
 
+import numpy as np
 import pandas as pd
 import requests
 import yfinance as yf
 from dotenv import load_dotenv
 from historical_loader import fetch_nyse_tickers
+from loader_utils import DEFAULT_SESSION, DEVNULL, as_ticker_columns
 try:
     from tqdm.auto import tqdm
 except Exception:  # pragma: no cover - fallback when tqdm is not available
     tqdm = None
+try:
+    import orjson
+except Exception:  # pragma: no cover - fallback when orjson is not available
+    orjson = None
 
 load_dotenv()
 
 
+def _load_json(response: requests.Response) -> dict:
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+
 def _require_api_key(provided_key: Optional[str], env_name: str) -> str:
     api_key = provided_key or os.getenv(env_name)
     if not api_key:
@@ -34,7 +48,7 @@ def fetch_intraday_twelve_data(
     timeout: int = 20,
 ) -> pd.DataFrame:
     key = _require_api_key(api_key, "TWELVE_DATA_API_KEY")
-    client = session or requests
+    client = session or DEFAULT_SESSION
 
     response = client.get(
         "https://api.twelvedata.com/time_series",
@@ -47,7 +61,7 @@ def fetch_intraday_twelve_data(
         timeout=timeout,
     )
     response.raise_for_status()
-    data = response.json()
+    data = _load_json(response)
 
     values = data.get("values")
     if not isinstance(values, list) or not values:
@@ -73,7 +87,7 @@ def fetch_intraday_alpha_vantage(
     timeout: int = 20,
 ) -> pd.DataFrame:
     key = _require_api_key(api_key, "ALPHA_VANTAGE_API_KEY")
-    client = session or requests
+    client = session or DEFAULT_SESSION
 
     response = client.get(
         "https://www.alphavantage.co/query",
@@ -87,7 +101,7 @@ def fetch_intraday_alpha_vantage(
         timeout=timeout,
     )
     response.raise_for_status()
-    data = response.json()
+    data = _load_json(response)
 
     if "Information" in data:
         raise RuntimeError(f"Alpha Vantage info for {symbol}: {data['Information']}")
@@ -101,25 +115,141 @@ def fetch_intraday_alpha_vantage(
     if not isinstance(series, dict) or not series:
         raise RuntimeError(f"Alpha Vantage request failed for {symbol}: Unexpected response format")
 
-    rows = []
+    datetimes, opens, highs, lows, closes, volumes = [], [], [], [], [], []
     for dt_str, payload in series.items():
-        rows.append(
-            {
-                "datetime": pd.to_datetime(dt_str),
-                "open": pd.to_numeric(payload.get("1. open"), errors="coerce"),
-                "high": pd.to_numeric(payload.get("2. high"), errors="coerce"),
-                "low": pd.to_numeric(payload.get("3. low"), errors="coerce"),
-                "close": pd.to_numeric(payload.get("4. close"), errors="coerce"),
-                "volume": pd.to_numeric(payload.get("5. volume"), errors="coerce"),
-            }
-        )
-
-    df = pd.DataFrame(rows).sort_values("datetime").reset_index(drop=True)
+        datetimes.append(dt_str)
+        opens.append(payload.get("1. open"))
+        highs.append(payload.get("2. high"))
+        lows.append(payload.get("3. low"))
+        closes.append(payload.get("4. close"))
+        volumes.append(payload.get("5. volume"))
+
+    df = pd.DataFrame(
+        {
+            "datetime": pd.to_datetime(datetimes),
+            "open": pd.to_numeric(opens, errors="coerce"),
+            "high": pd.to_numeric(highs, errors="coerce"),
+            "low": pd.to_numeric(lows, errors="coerce"),
+            "close": pd.to_numeric(closes, errors="coerce"),
+            "volume": pd.to_numeric(volumes, errors="coerce"),
+        }
+    )
+    df = df.sort_values("datetime").reset_index(drop=True)
     df["symbol"] = symbol
     df["provider"] = "alpha_vantage"
     return df
 
 
+class _RateLimiter:
+    """Hands out request slots at most ``requests_per_minute`` apart, shared across threads."""
+
+    def __init__(self, requests_per_minute: float) -> None:
+        self._interval = 60.0 / requests_per_minute
+        self._lock = threading.Lock()
+        self._next_slot = time.monotonic()
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next_slot, now)
+            self._next_slot = slot + self._interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def _fetch_many(
+    fetch: Callable[..., pd.DataFrame],
+    symbols: list[str],
+    max_concurrency: int,
+    requests_per_minute: Optional[float],
+    session: Optional[requests.Session],
+    **kwargs,
+) -> pd.DataFrame:
+    """Fetch ``symbols`` concurrently under a provider rate limit.
+
+    Per-symbol failures do not discard the other frames; they are reported in
+    ``df.attrs["errors"]``. Only when every symbol fails is an error raised.
+    """
+    unique_symbols = list(dict.fromkeys(symbols))
+    if not unique_symbols:
+        raise ValueError("No symbols to fetch")
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be >= 1")
+    if requests_per_minute is not None and requests_per_minute <= 0:
+        raise ValueError("requests_per_minute must be > 0")
+
+    limiter = _RateLimiter(requests_per_minute) if requests_per_minute else None
+    # One pooled session for the whole fan-out so each host is handshaken once.
+    client = session or DEFAULT_SESSION
+
+    def fetch_one(symbol: str) -> tuple[str, Optional[pd.DataFrame], Optional[Exception]]:
+        if limiter is not None:
+            limiter.wait()
+        try:
+            return symbol, fetch(symbol, session=client, **kwargs), None
+        except (requests.RequestException, RuntimeError, ValueError) as exc:
+            return symbol, None, exc
+
+    with ThreadPoolExecutor(max_workers=min(max_concurrency, len(unique_symbols))) as executor:
+        results = list(executor.map(fetch_one, unique_symbols))
+
+    frames = [frame for _, frame, _ in results if frame is not None]
+    errors = {symbol: str(exc) for symbol, _, exc in results if exc is not None}
+    if not frames:
+        failed_sample = "; ".join(f"{symbol}: {message}" for symbol, message in list(errors.items())[:5])
+        raise RuntimeError(f"Failed to fetch {len(errors)} symbol(s): {failed_sample}")
+
+    combined = pd.concat(frames, ignore_index=True)
+    combined.attrs["errors"] = errors
+    return combined
+
+
+def fetch_intraday_twelve_data_many(
+    symbols: list[str],
+    interval: str = "5min",
+    outputsize: int = 100,
+    api_key: Optional[str] = None,
+    session: Optional[requests.Session] = None,
+    timeout: int = 20,
+    max_concurrency: int = 8,
+    requests_per_minute: Optional[float] = 8,
+) -> pd.DataFrame:
+    return _fetch_many(
+        fetch_intraday_twelve_data,
+        symbols,
+        max_concurrency,
+        requests_per_minute,
+        session,
+        interval=interval,
+        outputsize=outputsize,
+        api_key=_require_api_key(api_key, "TWELVE_DATA_API_KEY"),
+        timeout=timeout,
+    )
+
+
+def fetch_intraday_alpha_vantage_many(
+    symbols: list[str],
+    interval: str = "5min",
+    outputsize: str = "compact",
+    api_key: Optional[str] = None,
+    session: Optional[requests.Session] = None,
+    timeout: int = 20,
+    max_concurrency: int = 4,
+    requests_per_minute: Optional[float] = 5,
+) -> pd.DataFrame:
+    return _fetch_many(
+        fetch_intraday_alpha_vantage,
+        symbols,
+        max_concurrency,
+        requests_per_minute,
+        session,
+        interval=interval,
+        outputsize=outputsize,
+        api_key=_require_api_key(api_key, "ALPHA_VANTAGE_API_KEY"),
+        timeout=timeout,
+    )
+
+
 def fetch_daily_alpha_vantage_latest_date(
     symbol: str,
     api_key: Optional[str] = None,
@@ -127,7 +257,7 @@ def fetch_daily_alpha_vantage_latest_date(
     timeout: int = 20,
 ) -> str:
     key = _require_api_key(api_key, "ALPHA_VANTAGE_API_KEY")
-    client = session or requests
+    client = session or DEFAULT_SESSION
     response = client.get(
         "https://www.alphavantage.co/query",
         params={
@@ -139,7 +269,7 @@ def fetch_daily_alpha_vantage_latest_date(
         timeout=timeout,
     )
     response.raise_for_status()
-    data = response.json()
+    data = _load_json(response)
 
     if "Information" in data:
         raise RuntimeError(f"Alpha Vantage info for {symbol}: {data['Information']}")
@@ -155,47 +285,35 @@ def fetch_daily_alpha_vantage_latest_date(
 
 
 def _extract_open_prices_from_daily_batch(raw: pd.DataFrame, batch: list[str]) -> pd.DataFrame:
-    rows: list[dict] = []
+    columns = ["date", "ticker", "open", "provider"]
     if raw.empty:
-        return pd.DataFrame(columns=["date", "ticker", "open", "provider"])
-
-    if isinstance(raw.columns, pd.MultiIndex):
-        level0 = set(raw.columns.get_level_values(0))
-        for ticker in batch:
-            if ticker not in level0:
-                continue
-            ticker_df = raw[ticker].dropna(how="all")
-            if ticker_df.empty or "Open" not in ticker_df.columns:
-                continue
-            latest_idx = ticker_df.index.max()
-            open_value = pd.to_numeric(ticker_df.loc[latest_idx, "Open"], errors="coerce")
-            if pd.isna(open_value):
-                continue
-            rows.append(
-                {
-                    "date": pd.to_datetime(latest_idx).date(),
-                    "ticker": ticker,
-                    "open": float(open_value),
-                    "provider": "yfinance",
-                }
-            )
-    else:
-        ticker = batch[0]
-        ticker_df = raw.dropna(how="all")
-        if not ticker_df.empty and "Open" in ticker_df.columns:
-            latest_idx = ticker_df.index.max()
-            open_value = pd.to_numeric(ticker_df.loc[latest_idx, "Open"], errors="coerce")
-            if not pd.isna(open_value):
-                rows.append(
-                    {
-                        "date": pd.to_datetime(latest_idx).date(),
-                        "ticker": ticker,
-                        "open": float(open_value),
-                        "provider": "yfinance",
-                    }
-                )
+        return pd.DataFrame(columns=columns)
 
-    return pd.DataFrame(rows, columns=["date", "ticker", "open", "provider"])
+    raw = as_ticker_columns(raw, batch).sort_index()
+
+    if "Open" not in raw.columns.get_level_values(1):
+        return pd.DataFrame(columns=columns)
+    opens = raw.xs("Open", level=1, axis=1)
+    tickers = [ticker for ticker in batch if ticker in opens.columns]
+    if not tickers:
+        return pd.DataFrame(columns=columns)
+
+    # dates x tickers: does the ticker have any field populated on that date?
+    has_row = raw.notna().T.groupby(level=0).any().T[tickers].to_numpy()
+    latest_pos = len(has_row) - 1 - np.argmax(has_row[::-1], axis=0)
+    open_values = opens[tickers].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+    latest_open = open_values[latest_pos, np.arange(len(tickers))]
+    keep = has_row.any(axis=0) & ~np.isnan(latest_open)
+
+    return pd.DataFrame(
+        {
+            "date": pd.DatetimeIndex(raw.index[latest_pos[keep]]).date,
+            "ticker": np.array(tickers, dtype=object)[keep],
+            "open": latest_open[keep],
+            "provider": "yfinance",
+        },
+        columns=columns,
+    )
 
 
 def _format_eta(seconds: float) -> str:
@@ -231,7 +349,6 @@ def fetch_nyse_latest_open_prices(
     total_batches = (total_tickers + batch_size - 1) // batch_size
     if show_progress and tqdm is not None:
         progress_bar = tqdm(total=total_tickers, desc="Intraday open download", unit="ticker")
-    devnull_stream = open(os.devnull, "w") if silence_yfinance_output else None
 
     try:
         for batch_index, start in enumerate(range(0, total_tickers, batch_size)):
@@ -248,18 +365,10 @@ def fetch_nyse_latest_open_prices(
                     f"completed {completed}/{total_tickers} | elapsed {_format_eta(elapsed)}"
                 )
 
-            if silence_yfinance_output and devnull_stream is not None:
-                with contextlib.redirect_stdout(devnull_stream), contextlib.redirect_stderr(devnull_stream):
-                    raw = yf.download(
-                        batch,
-                        period="5d",
-                        interval="1d",
-                        auto_adjust=False,
-                        progress=False,
-                        group_by="ticker",
-                        threads=True,
-                    )
-            else:
+            with contextlib.ExitStack() as stack:
+                if silence_yfinance_output:
+                    stack.enter_context(contextlib.redirect_stdout(DEVNULL))
+                    stack.enter_context(contextlib.redirect_stderr(DEVNULL))
                 raw = yf.download(
                     batch,
                     period="5d",
@@ -288,11 +397,8 @@ def fetch_nyse_latest_open_prices(
                     f"elapsed {_format_eta(elapsed)} | ETA {_format_eta(eta_seconds)}"
                 )
     finally:
-        if devnull_stream is not None:
-            devnull_stream.close()
-
-    if progress_bar is not None:
-        progress_bar.close()
+        if progress_bar is not None:
+            progress_bar.close()
 
     if not frames:
         raise RuntimeError("No opening prices returned from yfinance")
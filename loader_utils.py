@@ -0,0 +1,31 @@
+import os
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Shared keep-alive pool so repeated calls reuse TCP/TLS connections per host.
+# Every loader uses this one session rather than keeping a pool of its own.
+DEFAULT_SESSION = requests.Session()
+DEFAULT_SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=32,
+        pool_maxsize=32,
+        max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504]),
+    ),
+)
+
+# Opened once per process and reused to swallow yfinance's console chatter.
+DEVNULL = open(os.devnull, "w")
+
+
+def as_ticker_columns(raw: pd.DataFrame, batch: list[str]) -> pd.DataFrame:
+    """Return ``raw`` with (ticker, field) columns, whatever shape yfinance returned."""
+    if isinstance(raw.columns, pd.MultiIndex):
+        return raw
+    # Single-ticker downloads come back flat; lift them into the batch layout.
+    raw = raw.copy()
+    raw.columns = pd.MultiIndex.from_product([[batch[0]], raw.columns])
+    return raw
@@ -1,3 +1,4 @@
+import historical_loader
 from historical_loader import download_historical_daily_prices, fetch_nyse_tickers
 import pandas as pd
 
@@ -6,6 +7,7 @@ class DummyResponse:
     def __init__(self, payload=None, text=""):
         self._payload = payload
         self.text = text
+        self.content = text.encode()
 
     def raise_for_status(self):
         return None
@@ -41,6 +43,19 @@ def test_fetch_nyse_tickers_filters_invalid_symbols():
     assert tickers == ["AAPL", "IBM"]
 
 
+def test_fetch_nyse_tickers_delegates_to_nyse_symbols(monkeypatch):
+    calls = []
+
+    def fake_symbols_only(limit=None, session=None, timeout=20, include_exchanges=None):
+        calls.append((limit, session, include_exchanges))
+        return ["AAPL", "IBM"]
+
+    monkeypatch.setattr("historical_loader.fetch_nyse_tickers_symbols_only", fake_symbols_only)
+
+    assert fetch_nyse_tickers(limit=2) == ["AAPL", "IBM"]
+    assert calls == [(2, None, {"N"})]
+
+
 def test_download_historical_daily_prices_yfinance_multi_ticker(monkeypatch):
     dates = pd.to_datetime(["2026-02-17", "2026-02-18"])
     cols = pd.MultiIndex.from_product(
@@ -72,10 +87,36 @@ def test_download_historical_daily_prices_yfinance_multi_ticker(monkeypatch):
     assert df["Ticker"].nunique() == 2
     assert list(df.columns) == ["Date", "Ticker", "Open", "High", "Low", "Close", "Volume", "Adj Close", "Provider"]
     assert df.iloc[0]["Ticker"] == "AAPL"
-    assert str(df["Date"].max()) == "2026-02-18"
+    assert pd.api.types.is_datetime64_dtype(df["Date"])
+    assert df["Date"].max() == pd.Timestamp("2026-02-18")
     assert set(df["Provider"].unique()) == {"yfinance"}
 
 
+def test_download_historical_daily_prices_price_columns_are_float32(monkeypatch):
+    dates = pd.to_datetime(["2026-02-17", "2026-02-18"])
+    cols = pd.MultiIndex.from_product(
+        [["BRK-A", "IBM"], ["Open", "High", "Low", "Close", "Adj Close", "Volume"]]
+    )
+    raw = pd.DataFrame(index=dates, columns=cols, dtype=float)
+    # A ~$712k quote is not exactly representable in float32; the schema must not change.
+    raw[("BRK-A", "Open")] = [712345.67, 713001.23]
+    raw[("BRK-A", "Close")] = [712000.5, 713500.25]
+    raw[("IBM", "Open")] = [248, 250]
+    raw[("IBM", "Close")] = [248.5, 250.4]
+
+    monkeypatch.setattr("historical_loader.yf.download", lambda *args, **kwargs: raw)
+
+    df = download_historical_daily_prices(
+        start_date="2026-02-17",
+        end_date="2026-02-18",
+        tickers=["BRK-A", "IBM"],
+        show_progress=False,
+    )
+
+    for col in ["Open", "High", "Low", "Close", "Adj Close"]:
+        assert df[col].dtype == "float32"
+
+
 def test_download_historical_daily_prices_yfinance_single_ticker(monkeypatch):
     dates = pd.to_datetime(["2026-02-17", "2026-02-18"])
     raw = pd.DataFrame(
@@ -99,8 +140,8 @@ def test_download_historical_daily_prices_yfinance_single_ticker(monkeypatch):
     )
 
     assert len(df) == 2
-    assert str(df["Date"].min()) == "2026-02-17"
-    assert str(df["Date"].max()) == "2026-02-18"
+    assert df["Date"].min() == pd.Timestamp("2026-02-17")
+    assert df["Date"].max() == pd.Timestamp("2026-02-18")
     assert df["Ticker"].unique().tolist() == ["IBM"]
 
 
@@ -189,6 +230,55 @@ def test_download_historical_daily_prices_retries_on_exception(monkeypatch):
     assert df["Ticker"].unique().tolist() == ["IBM"]
 
 
+def test_download_historical_daily_prices_backs_off_without_blocking_other_tickers(monkeypatch):
+    dates = pd.to_datetime(["2026-02-17", "2026-02-18"])
+    raw = pd.DataFrame(
+        {
+            "Open": [248, 250],
+            "High": [249, 251],
+            "Low": [247, 249],
+            "Close": [248.5, 250.4],
+            "Adj Close": [248.4, 250.3],
+            "Volume": [1900, 2000],
+        },
+        index=dates,
+    )
+
+    clock = {"now": 1000.0}
+    sleeps = []
+
+    def fake_sleep(seconds):
+        sleeps.append(seconds)
+        clock["now"] += seconds
+
+    batches = []
+
+    def fake_download(batch, **kwargs):
+        batches.append(batch)
+        if batch == ["A"] and batches.count(["A"]) == 1:
+            raise RuntimeError("rate limit")
+        return raw
+
+    monkeypatch.setattr("historical_loader.time.monotonic", lambda: clock["now"])
+    monkeypatch.setattr("historical_loader.time.sleep", fake_sleep)
+    monkeypatch.setattr("historical_loader.yf.download", fake_download)
+
+    df = download_historical_daily_prices(
+        start_date="2026-02-17",
+        end_date="2026-02-18",
+        tickers=["A", "B", "C"],
+        batch_size=1,
+        retry_backoff_seconds=10,
+        show_progress=False,
+    )
+
+    # B and C go out while A waits; the loop then sleeps once, until A's backoff (plus jitter) elapses.
+    assert batches == [["A"], ["B"], ["C"], ["A"]]
+    assert len(sleeps) == 1
+    assert 10 <= sleeps[0] <= 15
+    assert set(df["Ticker"].unique()) == {"A", "B", "C"}
+
+
 def test_download_historical_daily_prices_raises_when_retry_budget_exhausted(monkeypatch):
     def fake_download(batch, **kwargs):
         raise RuntimeError("rate limit")
@@ -231,6 +321,7 @@ def test_download_historical_daily_prices_retries_no_data_before_confirming(monk
         return full_ibm
 
     monkeypatch.setattr("historical_loader.yf.download", fake_download)
+    monkeypatch.setattr("historical_loader._is_known_delisted", lambda ticker: False)
 
     df = download_historical_daily_prices(
         start_date="2026-02-17",
@@ -245,6 +336,105 @@ def test_download_historical_daily_prices_retries_no_data_before_confirming(monk
     assert df["Ticker"].unique().tolist() == ["IBM"]
 
 
+def test_download_historical_daily_prices_skips_no_data_retry_for_delisted(monkeypatch):
+    dates = pd.to_datetime(["2026-02-17", "2026-02-18"])
+    cols = pd.MultiIndex.from_product(
+        [["AAPL", "GONE"], ["Open", "High", "Low", "Close", "Adj Close", "Volume"]]
+    )
+    raw = pd.DataFrame(index=dates, columns=cols, dtype=float)
+    raw[("AAPL", "Open")] = [189, 190]
+    raw[("AAPL", "Close")] = [189.3, 190.5]
+
+    calls = {"count": 0}
+
+    def fake_download(batch, **kwargs):
+        calls["count"] += 1
+        return raw
+
+    monkeypatch.setattr("historical_loader.yf.download", fake_download)
+    monkeypatch.setattr("historical_loader._is_known_delisted", lambda ticker: ticker == "GONE")
+
+    df = download_historical_daily_prices(
+        start_date="2026-02-17",
+        end_date="2026-02-18",
+        tickers=["AAPL", "GONE"],
+        no_data_confirmations=3,
+        retry_backoff_seconds=0,
+    )
+
+    assert calls["count"] == 1
+    assert df["Ticker"].unique().tolist() == ["AAPL"]
+
+
+def test_probe_delisted_only_trusts_yahoo_not_found(monkeypatch):
+    monkeypatch.setattr("historical_loader._delisted_cache", set())
+    bodies = {
+        "GONE": (404, {"chart": {"result": None, "error": {"code": "Not Found", "description": "No data found"}}}),
+        "LIVE": (200, {"chart": {"result": [{}], "error": None}}),
+        "BUSY": (429, {}),
+        "ODD": (404, {"chart": {"error": {"code": "Bad Request"}}}),
+    }
+
+    class ProbeResponse(DummyResponse):
+        def __init__(self, status_code, payload):
+            super().__init__(payload=payload)
+            self.status_code = status_code
+
+    class ProbeSession:
+        def __init__(self):
+            self.urls = []
+
+        def get(self, url, params=None, timeout=20):
+            self.urls.append(url)
+            return ProbeResponse(*bodies[url.rsplit("/", 1)[-1]])
+
+    session = ProbeSession()
+    monkeypatch.setattr("historical_loader._PROBE_SESSION", session)
+
+    mask = historical_loader._probe_delisted(["GONE", "LIVE", "BUSY", "ODD"])
+
+    assert mask.tolist() == [True, False, False, False]
+    assert historical_loader._delisted_cache == {"GONE"}
+    # Confirmed symbols are answered from the process cache afterwards.
+    assert historical_loader._probe_delisted(["GONE"]).tolist() == [True]
+    assert len(session.urls) == 4
+
+
+def test_download_historical_daily_prices_probes_each_no_data_ticker_once(monkeypatch):
+    dates = pd.to_datetime(["2026-02-17", "2026-02-18"])
+    cols = pd.MultiIndex.from_product(
+        [["IBM"], ["Open", "High", "Low", "Close", "Adj Close", "Volume"]]
+    )
+    empty_ibm = pd.DataFrame(index=dates, columns=cols, dtype=float)
+    calls = {"download": 0, "probe": 0}
+
+    def fake_download(batch, **kwargs):
+        calls["download"] += 1
+        return empty_ibm
+
+    def fake_probe(ticker):
+        calls["probe"] += 1
+        return False
+
+    monkeypatch.setattr("historical_loader.yf.download", fake_download)
+    monkeypatch.setattr("historical_loader._is_known_delisted", fake_probe)
+
+    try:
+        download_historical_daily_prices(
+            start_date="2026-02-17",
+            end_date="2026-02-18",
+            tickers=["IBM"],
+            no_data_confirmations=3,
+            retry_backoff_seconds=0,
+            show_progress=False,
+        )
+        assert False, "Expected RuntimeError"
+    except RuntimeError as exc:
+        assert "No historical price data" in str(exc)
+
+    assert calls == {"download": 3, "probe": 1}
+
+
 def test_download_historical_daily_prices_deduplicates_repeated_ticker_rows(monkeypatch):
     dates = pd.to_datetime(["2026-02-17", "2026-02-18"])
     cols = pd.MultiIndex.from_product(
@@ -275,3 +465,30 @@ def test_download_historical_daily_prices_deduplicates_repeated_ticker_rows(monk
 
     assert len(df) == 2
     assert df[["Ticker", "Date"]].duplicated().sum() == 0
+
+
+def test_download_historical_daily_prices_writes_individual_csvs(monkeypatch, tmp_path):
+    dates = pd.to_datetime(["2026-02-17", "2026-02-18"])
+    cols = pd.MultiIndex.from_product(
+        [["AAPL", "IBM"], ["Open", "High", "Low", "Close", "Adj Close", "Volume"]]
+    )
+    raw = pd.DataFrame(index=dates, columns=cols, dtype=float)
+    raw[("AAPL", "Open")] = [189, 190]
+    raw[("AAPL", "Close")] = [189.3, 190.5]
+    raw[("IBM", "Open")] = [248, 250]
+    raw[("IBM", "Close")] = [248.5, 250.4]
+
+    monkeypatch.setattr("historical_loader.yf.download", lambda *args, **kwargs: raw)
+
+    download_historical_daily_prices(
+        start_date="2026-02-17",
+        end_date="2026-02-18",
+        tickers=["AAPL", "IBM"],
+        individual_dir=str(tmp_path),
+        show_progress=False,
+    )
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["AAPL.csv", "IBM.csv"]
+    ibm = pd.read_csv(tmp_path / "IBM.csv")
+    assert ibm["Ticker"].unique().tolist() == ["IBM"]
+    assert ibm["Date"].tolist() == ["2026-02-17", "2026-02-18"]
@@ -1,8 +1,12 @@
+import json
+
 import pandas as pd
 
 from intraday_loader import (
     fetch_intraday_alpha_vantage,
+    fetch_intraday_alpha_vantage_many,
     fetch_intraday_twelve_data,
+    fetch_intraday_twelve_data_many,
     fetch_nyse_latest_open_prices,
 )
 
@@ -11,6 +15,7 @@ class DummyResponse:
     def __init__(self, payload, text=""):
         self._payload = payload
         self.text = text
+        self.content = json.dumps(payload).encode()
 
     def raise_for_status(self):
         return None
@@ -66,6 +71,77 @@ def test_fetch_intraday_twelve_data_parses_rows():
     assert pd.api.types.is_numeric_dtype(df["close"])
 
 
+def test_fetch_intraday_twelve_data_many_combines_symbols():
+    def payload(close):
+        return {
+            "values": [
+                {
+                    "datetime": "2026-02-18 16:00:00",
+                    "open": "1.0",
+                    "high": "2.0",
+                    "low": "0.5",
+                    "close": close,
+                    "volume": "100",
+                }
+            ]
+        }
+
+    session = DummySession({"AAPL": payload("190.5"), "IBM": payload("250.4")})
+
+    df = fetch_intraday_twelve_data_many(
+        ["AAPL", "IBM", "AAPL"],
+        api_key="x",
+        session=session,
+        max_concurrency=2,
+        requests_per_minute=None,
+    )
+
+    assert df["symbol"].tolist() == ["AAPL", "IBM"]
+    assert df["close"].tolist() == [190.5, 250.4]
+    assert set(df["provider"].unique()) == {"twelve_data"}
+
+
+def test_fetch_intraday_alpha_vantage_many_rate_limits_and_keeps_partial_results(monkeypatch):
+    def payload(close):
+        return {
+            "Time Series (5min)": {
+                "2026-02-18 16:00:00": {
+                    "1. open": "1.0",
+                    "2. high": "2.0",
+                    "3. low": "0.5",
+                    "4. close": close,
+                    "5. volume": "100",
+                }
+            }
+        }
+
+    session = DummySession(
+        {
+            "IBM": payload("250.4"),
+            "KO": {"Note": "API call frequency exceeded"},
+            "AAPL": payload("190.5"),
+        }
+    )
+    sleeps = []
+    monkeypatch.setattr("intraday_loader.time.sleep", sleeps.append)
+
+    df = fetch_intraday_alpha_vantage_many(
+        ["IBM", "KO", "AAPL"],
+        api_key="x",
+        session=session,
+        max_concurrency=1,
+        requests_per_minute=60,
+    )
+
+    assert df["symbol"].tolist() == ["IBM", "AAPL"]
+    assert df["close"].tolist() == [250.4, 190.5]
+    assert list(df.attrs["errors"]) == ["KO"]
+    assert "rate limit" in df.attrs["errors"]["KO"]
+    # Three requests at 60/min: the second and third wait for their slots.
+    assert len(sleeps) == 2
+    assert all(0 < delay <= 2.0 for delay in sleeps)
+
+
 def test_fetch_intraday_alpha_vantage_parses_rows():
     session = DummySession(
         {
@@ -1,14 +1,78 @@
-from ticker_loader import fetch_nyse_tickers_with_names
+import email.utils
+import io
+import os
+import time
+
+import pytest
+import requests
+
+import ticker_loader
+from ticker_loader import fetch_nyse_tickers_symbols_only, fetch_nyse_tickers_with_names
+
+SHARED_NYSE_TEXT = (
+    "ACT Symbol|Security Name|Exchange|CQS Symbol|ETF|Round Lot Size|Test Issue|NASDAQ Symbol\n"
+    "AAPL|Apple Inc.|N|AAPL|N|100|N|AAPL\n"
+    "GLD|SPDR Gold Shares|N|GLD|Y|100|N|GLD\n"
+    "ETNN|Random Income ETN|N|ETNN|Y|100|N|ETNN\n"
+    "ETCX|Silver Basket ETC|N|ETCX|Y|100|N|ETCX\n"
+    "IBM|International Business Machines|N|IBM|N|100|N|IBM\n"
+    "TSLA|Tesla Inc.|N|TSLA|N|100|N|TSLA\n"
+    "File Creation Time: 02182026\n"
+)
+
+
+@pytest.fixture(scope="module", autouse=True, params=["pyarrow", "pandas"])
+def csv_reader(request):
+    """Run every test against both the pyarrow reader and the pandas fallback."""
+    if request.param == "pyarrow" and ticker_loader.pacsv is None:
+        pytest.skip("pyarrow is not installed")
+    with pytest.MonkeyPatch.context() as mp:
+        if request.param == "pandas":
+            mp.setattr(ticker_loader, "pacsv", None)
+        yield request.param
+
+
+@pytest.fixture(scope="module")
+def parsed_nyse(csv_reader):
+    return ticker_loader._read_otherlisted(io.BytesIO(SHARED_NYSE_TEXT.encode()))
+
+
+@pytest.fixture
+def shared_session(monkeypatch, parsed_nyse):
+    """Session whose payload is served from the module-wide parsed frame."""
+    monkeypatch.setattr(ticker_loader, "_read_otherlisted", lambda source: parsed_nyse.copy())
+    return DummySession(nyse_text="")
 
 
 class DummyResponse:
     def __init__(self, text=""):
         self.text = text
+        self.content = text.encode()
 
     def raise_for_status(self):
         return None
 
 
+class StreamingResponse(DummyResponse):
+    status_code = 200
+
+    def __init__(self, text="", fail_after=None):
+        super().__init__(text=text)
+        self.fail_after = fail_after
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def iter_content(self, chunk_size=1):
+        for index, start in enumerate(range(0, len(self.content), 16)):
+            if index == self.fail_after:
+                raise requests.exceptions.ChunkedEncodingError("connection broken")
+            yield self.content[start : start + 16]
+
+
 class DummySession:
     def __init__(self, nyse_text):
         self.nyse_text = nyse_text
@@ -46,37 +110,191 @@ def test_fetch_nyse_tickers_with_names_filters_and_sorts():
     }
 
 
-def test_fetch_nyse_tickers_with_names_limit():
-    nyse_text = (
+def test_fetch_nyse_tickers_with_names_limit(shared_session):
+    df = fetch_nyse_tickers_with_names(limit=2, session=shared_session)
+
+    assert len(df) == 2
+    assert df["Ticker"].tolist() == ["AAPL", "ETCX"]
+
+
+def test_fetch_nyse_tickers_with_names_include_types_filter(shared_session):
+    df = fetch_nyse_tickers_with_names(include_types={"STOCK", "ETF"}, session=shared_session)
+
+    assert df["Ticker"].tolist() == ["AAPL", "GLD", "IBM", "TSLA"]
+    assert df["Type"].tolist() == ["STOCK", "ETF", "STOCK", "STOCK"]
+
+
+def test_fetch_nyse_tickers_with_names_single_side_type_filters(shared_session):
+    stocks = fetch_nyse_tickers_with_names(include_types={"stock"}, session=shared_session)
+    funds = fetch_nyse_tickers_with_names(include_types={"ETN", "ETC"}, session=shared_session)
+
+    assert stocks["Ticker"].tolist() == ["AAPL", "IBM", "TSLA"]
+    assert stocks["Type"].tolist() == ["STOCK", "STOCK", "STOCK"]
+    assert list(stocks["Type"].cat.categories) == ["STOCK", "ETF", "ETN", "ETC"]
+    assert dict(zip(funds["Ticker"], funds["Type"])) == {"ETCX": "ETC", "ETNN": "ETN"}
+
+
+def test_fetch_nyse_tickers_with_names_uses_fresh_disk_cache(monkeypatch, tmp_path):
+    cache_path = tmp_path / "otherlisted.txt"
+    cache_path.write_text(
         "ACT Symbol|Security Name|Exchange|CQS Symbol|ETF|Round Lot Size|Test Issue|NASDAQ Symbol\n"
-        "AAPL|Apple Inc.|N|AAPL|N|100|N|AAPL\n"
         "IBM|International Business Machines|N|IBM|N|100|N|IBM\n"
-        "TSLA|Tesla Inc.|N|TSLA|N|100|N|TSLA\n"
         "File Creation Time: 02182026\n"
     )
-    session = DummySession(nyse_text=nyse_text)
+    monkeypatch.setattr("ticker_loader._OTHERLISTED_CACHE_PATH", str(cache_path))
 
-    df = fetch_nyse_tickers_with_names(limit=2, session=session)
+    def fail_get(*args, **kwargs):
+        raise AssertionError("network should not be used on a fresh cache")
 
-    assert len(df) == 2
-    assert df["Ticker"].tolist() == ["AAPL", "IBM"]
+    monkeypatch.setattr("loader_utils.DEFAULT_SESSION.get", fail_get)
+    ticker_loader.clear_cache()
+
+    try:
+        df = fetch_nyse_tickers_with_names()
+        assert df["Ticker"].tolist() == ["IBM"]
+
+        # Served from the per-process memo without touching disk again.
+        cache_path.unlink()
+        df["Ticker"] = "MUTATED"
+        assert fetch_nyse_tickers_with_names()["Ticker"].tolist() == ["IBM"]
+    finally:
+        ticker_loader.clear_cache()
+
+
+def test_fetch_nyse_tickers_symbols_only_memoizes_default_transport(monkeypatch, tmp_path):
+    cache_path = tmp_path / "otherlisted.txt"
+    cache_path.write_text(
+        "ACT Symbol|Security Name|Exchange|CQS Symbol|ETF|Round Lot Size|Test Issue|NASDAQ Symbol\n"
+        "IBM|International Business Machines|N|IBM|N|100|N|IBM\n"
+        "KO|Coca-Cola|N|KO|N|100|N|KO\n"
+        "File Creation Time: 02182026\n"
+    )
+    monkeypatch.setattr("ticker_loader._OTHERLISTED_CACHE_PATH", str(cache_path))
+    opens = []
+    real_open = ticker_loader._open_otherlisted
+
+    def counting_open(session, timeout, *args):
+        opens.append(session)
+        return real_open(session, timeout, *args)
+
+    monkeypatch.setattr("ticker_loader._open_otherlisted", counting_open)
+    ticker_loader.clear_cache()
+
+    try:
+        assert fetch_nyse_tickers_symbols_only(limit=1, include_exchanges={"N"}) == ["IBM"]
+        symbols = fetch_nyse_tickers_symbols_only(include_exchanges={"N"})
+        symbols.append("MUTATED")
+        assert fetch_nyse_tickers_symbols_only(include_exchanges={"N"}) == ["IBM", "KO"]
+        assert opens == [None]
+
+        ticker_loader.clear_cache()
+        assert fetch_nyse_tickers_symbols_only(include_exchanges={"N"}) == ["IBM", "KO"]
+        assert opens == [None, None]
+    finally:
+        ticker_loader.clear_cache()
+
+
+def test_fetch_nyse_tickers_with_names_revalidates_stale_cache(monkeypatch, tmp_path):
+    cache_path = tmp_path / "otherlisted.txt"
+    cache_path.write_text(
+        "ACT Symbol|Security Name|Exchange|CQS Symbol|ETF|Round Lot Size|Test Issue|NASDAQ Symbol\n"
+        "IBM|International Business Machines|N|IBM|N|100|N|IBM\n"
+        "File Creation Time: 02182026\n"
+    )
+    stale = time.time() - 2 * 86400
+    os.utime(cache_path, (stale, stale))
+    monkeypatch.setattr("ticker_loader._OTHERLISTED_CACHE_PATH", str(cache_path))
+    seen_headers = []
+
+    def fake_get(url, headers=None, timeout=20, stream=False):
+        seen_headers.append(headers)
+        response = StreamingResponse()
+        response.status_code = 304
+        return response
+
+    monkeypatch.setattr("loader_utils.DEFAULT_SESSION.get", fake_get)
+    ticker_loader.clear_cache()
+
+    try:
+        df = fetch_nyse_tickers_with_names()
+    finally:
+        ticker_loader.clear_cache()
 
+    assert df["Ticker"].tolist() == ["IBM"]
+    assert seen_headers == [{"If-Modified-Since": email.utils.formatdate(stale, usegmt=True)}]
+    # The 304 renews the cached copy for another TTL window.
+    assert os.path.getmtime(cache_path) > stale + 86400
 
-def test_fetch_nyse_tickers_with_names_include_types_filter():
+
+def test_fetch_nyse_tickers_with_names_streams_download_into_cache(monkeypatch, tmp_path):
     nyse_text = (
         "ACT Symbol|Security Name|Exchange|CQS Symbol|ETF|Round Lot Size|Test Issue|NASDAQ Symbol\n"
-        "AAPL|Apple Inc.|N|AAPL|N|100|N|AAPL\n"
-        "GLD|SPDR Gold Shares|N|GLD|Y|100|N|GLD\n"
-        "ETNN|Random Income ETN|N|ETNN|Y|100|N|ETNN\n"
-        "ETCX|Silver Basket ETC|N|ETCX|Y|100|N|ETCX\n"
+        "IBM|International Business Machines|N|IBM|N|100|N|IBM\n"
         "File Creation Time: 02182026\n"
     )
-    session = DummySession(nyse_text=nyse_text)
+    cache_path = tmp_path / "cache" / "otherlisted.txt"
+    monkeypatch.setattr("ticker_loader._OTHERLISTED_CACHE_PATH", str(cache_path))
 
-    df = fetch_nyse_tickers_with_names(include_types={"STOCK", "ETF"}, session=session)
+    def fake_get(url, headers=None, timeout=20, stream=False):
+        assert stream
+        return StreamingResponse(text=nyse_text)
 
-    assert df["Ticker"].tolist() == ["AAPL", "GLD"]
-    assert df["Type"].tolist() == ["STOCK", "ETF"]
+    monkeypatch.setattr("loader_utils.DEFAULT_SESSION.get", fake_get)
+    ticker_loader.clear_cache()
+
+    try:
+        df = fetch_nyse_tickers_with_names()
+    finally:
+        ticker_loader.clear_cache()
+
+    assert df["Ticker"].tolist() == ["IBM"]
+    assert cache_path.read_text() == nyse_text
+    assert [p.name for p in cache_path.parent.iterdir()] == ["otherlisted.txt"]
+
+
+def test_fetch_nyse_tickers_with_names_discards_partial_download(monkeypatch, tmp_path):
+    cache_path = tmp_path / "otherlisted.txt"
+    monkeypatch.setattr("ticker_loader._OTHERLISTED_CACHE_PATH", str(cache_path))
+
+    def fake_get(url, headers=None, timeout=20, stream=False):
+        return StreamingResponse(text=SHARED_NYSE_TEXT, fail_after=2)
+
+    monkeypatch.setattr("loader_utils.DEFAULT_SESSION.get", fake_get)
+    ticker_loader.clear_cache()
+
+    try:
+        with pytest.raises(requests.exceptions.ChunkedEncodingError):
+            fetch_nyse_tickers_with_names()
+    finally:
+        ticker_loader.clear_cache()
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_fetch_nyse_tickers_with_names_falls_back_when_cache_write_fails(monkeypatch, tmp_path):
+    cache_path = tmp_path / "otherlisted.txt"
+    monkeypatch.setattr("ticker_loader._OTHERLISTED_CACHE_PATH", str(cache_path))
+    streams = []
+
+    def fake_get(url, headers=None, timeout=20, stream=False):
+        streams.append(stream)
+        return StreamingResponse(text=SHARED_NYSE_TEXT)
+
+    def fail_replace(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr("loader_utils.DEFAULT_SESSION.get", fake_get)
+    monkeypatch.setattr("ticker_loader.os.replace", fail_replace)
+    ticker_loader.clear_cache()
+
+    try:
+        df = fetch_nyse_tickers_with_names()
+    finally:
+        ticker_loader.clear_cache()
+
+    assert df["Ticker"].tolist() == ["AAPL", "ETCX", "ETNN", "GLD", "IBM", "TSLA"]
+    assert streams == [True, False]
+    assert list(tmp_path.iterdir()) == []
 
 
 def test_fetch_nyse_tickers_with_names_includes_arca_by_default():
@@ -92,3 +310,21 @@ def test_fetch_nyse_tickers_with_names_includes_arca_by_default():
 
     assert df["Ticker"].tolist() == ["AAPL", "GLD"]
     assert df["Type"].tolist() == ["STOCK", "ETF"]
+
+
+def test_fetch_nyse_tickers_symbols_only_matches_with_names():
+    nyse_text = (
+        "ACT Symbol|Security Name|Exchange|CQS Symbol|ETF|Round Lot Size|Test Issue|NASDAQ Symbol\n"
+        "IBM|International Business Machines|N|IBM|N|100|N|IBM\n"
+        "GLD|SPDR Gold Shares|P|GLD|Y|100|N|GLD\n"
+        "BRK.B|Berkshire Hathaway|N|BRK.B|N|100|N|BRK.B\n"
+        "MSFT|Microsoft Corporation|Q|MSFT|N|100|N|MSFT\n"
+        "AAPL|Apple Inc.|N|AAPL|N|100|N|AAPL\n"
+        "AAPL|Apple Inc. Duplicate|N|AAPL|N|100|N|AAPL\n"
+        "File Creation Time: 02182026\n"
+    )
+    session = DummySession(nyse_text=nyse_text)
+
+    assert fetch_nyse_tickers_symbols_only(session=session) == ["AAPL", "GLD", "IBM"]
+    assert fetch_nyse_tickers_symbols_only(session=session, include_exchanges={"n"}) == ["AAPL", "IBM"]
+    assert fetch_nyse_tickers_symbols_only(limit=1, session=session) == ["AAPL"]
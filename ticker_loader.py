@@ -1,21 +1,177 @@
 import io
-import re
-from typing import Optional
+import os
+import time
+import email.utils
+import functools
+import tempfile
+from datetime import date
+from typing import BinaryIO, Optional
 
+import numpy as np
 import pandas as pd
 import requests
 
+from loader_utils import DEFAULT_SESSION
 
-def _classify_security_type(etf_flag: str, company_name: str) -> str:
-    flag = str(etf_flag).strip().upper()
-    name = str(company_name).strip().upper()
-    if flag == "Y":
-        if re.search(r"\bETN\b|EXCHANGE TRADED NOTE", name):
-            return "ETN"
-        if re.search(r"\bETC\b|EXCHANGE TRADED COMMODITY", name):
-            return "ETC"
-        return "ETF"
-    return "STOCK"
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pacsv
+except Exception:  # pragma: no cover - fallback when pyarrow is not available
+    pacsv = None
+
+_OTHERLISTED_URL = "https://www.nasdaqtrader.com/dynamic/SymDir/otherlisted.txt"
+# The symbol directory is regenerated at most daily.
+_OTHERLISTED_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "stockapi", "otherlisted.txt")
+_OTHERLISTED_CACHE_TTL_SECONDS = 86400
+# Plain pattern strings rather than compiled regexes: every pandas string backend accepts them.
+_TICKER_RE = r"[A-Za-z]{1,5}"
+_ETN_RE = r"\bETN\b|EXCHANGE TRADED NOTE"
+_ETC_RE = r"\bETC\b|EXCHANGE TRADED COMMODITY"
+# NYSE family: N=NYSE, P=NYSE Arca, A=NYSE American
+_DEFAULT_EXCHANGES = frozenset({"N", "P", "A"})
+_DEFAULT_TYPES = frozenset({"STOCK", "ETF", "ETN", "ETC"})
+
+
+def _normalize_filter(values: Optional[set[str]], default: frozenset[str]) -> frozenset[str]:
+    # An omitted or empty filter means "all", served from the prebuilt default.
+    if not values:
+        return default
+    return frozenset(value.upper() for value in values)
+
+
+def _open_otherlisted(
+    session: Optional[requests.Session],
+    timeout: int,
+    ttl_seconds: float = _OTHERLISTED_CACHE_TTL_SECONDS,
+) -> BinaryIO:
+    """Open the raw symbol directory, served from disk while the cached copy is fresh.
+
+    A stale copy is revalidated with If-Modified-Since, and a fresh download is
+    streamed straight into the cache file rather than buffered in memory. An
+    explicit ``session`` always goes to the network so callers keep control of
+    transport.
+    """
+    if session is not None:
+        response = session.get(_OTHERLISTED_URL, timeout=timeout)
+        response.raise_for_status()
+        return io.BytesIO(response.content)
+
+    headers = {}
+    if os.path.exists(_OTHERLISTED_CACHE_PATH):
+        mtime = os.path.getmtime(_OTHERLISTED_CACHE_PATH)
+        if time.time() - mtime < ttl_seconds:
+            return open(_OTHERLISTED_CACHE_PATH, "rb")
+        headers["If-Modified-Since"] = email.utils.formatdate(mtime, usegmt=True)
+
+    with DEFAULT_SESSION.get(_OTHERLISTED_URL, headers=headers, timeout=timeout, stream=True) as response:
+        if response.status_code == 304:
+            os.utime(_OTHERLISTED_CACHE_PATH)
+            return open(_OTHERLISTED_CACHE_PATH, "rb")
+        response.raise_for_status()
+        cache_dir = os.path.dirname(_OTHERLISTED_CACHE_PATH)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            # A per-writer temp name, so concurrent refreshes never interleave into one file.
+            cache_file = tempfile.NamedTemporaryFile(dir=cache_dir, suffix=".tmp", delete=False)
+        except OSError:
+            return io.BytesIO(response.content)
+        try:
+            with cache_file:
+                for chunk in response.iter_content(chunk_size=65536):
+                    cache_file.write(chunk)
+            os.replace(cache_file.name, _OTHERLISTED_CACHE_PATH)
+            return open(_OTHERLISTED_CACHE_PATH, "rb")
+        except requests.RequestException:
+            _discard(cache_file.name)
+            raise
+        except OSError:
+            # The cache is best-effort: the body was partly consumed, so refetch it uncached.
+            _discard(cache_file.name)
+
+    response = DEFAULT_SESSION.get(_OTHERLISTED_URL, timeout=timeout)
+    response.raise_for_status()
+    return io.BytesIO(response.content)
+
+
+def _discard(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _read_otherlisted(
+    source: BinaryIO,
+    columns: tuple[str, ...] = ("ACT Symbol", "Security Name", "Exchange", "ETF"),
+) -> pd.DataFrame:
+    """Parse ``columns`` of the symbol directory; Exchange and ETF come back as categoricals."""
+    flag_columns = {"Exchange", "ETF"}
+    if pacsv is not None:
+        flag_type = pa.dictionary(pa.int32(), pa.string())
+        table = pacsv.read_csv(
+            source,
+            parse_options=pacsv.ParseOptions(
+                delimiter="|",
+                # The trailing "File Creation Time" line has a single field.
+                invalid_row_handler=lambda row: "skip",
+            ),
+            convert_options=pacsv.ConvertOptions(
+                include_columns=list(columns),
+                column_types={col: flag_type if col in flag_columns else pa.string() for col in columns},
+            ),
+        )
+        return table.to_pandas()
+
+    # Only materialize the columns we use, all as plain strings; the single-field
+    # "File Creation Time" trailer row ends up with an empty Exchange and is filtered below.
+    return pd.read_csv(
+        source,
+        sep="|",
+        usecols=list(columns),
+        dtype={col: "category" if col in flag_columns else str for col in columns},
+        engine="c",
+        na_filter=False,
+    )
+
+
+def _listing_mask(ticker_df: pd.DataFrame, allowed_exchanges: frozenset[str]) -> tuple[pd.Series, pd.Series]:
+    """Return stripped symbols and the mask of rows with a plain ticker on an allowed exchange."""
+    exchange = ticker_df["Exchange"]
+    # Low-cardinality flags are categoricals: match against the handful of categories, not every row.
+    exchange_codes = [code for code in exchange.cat.categories if code.upper() in allowed_exchanges]
+    symbols = ticker_df["ACT Symbol"].str.strip()
+    return symbols, symbols.str.fullmatch(_TICKER_RE) & exchange.isin(exchange_codes)
+
+
+def _read_symbols(source: BinaryIO, allowed_exchanges: frozenset[str]) -> list[str]:
+    """Parse only the symbol and exchange columns and return sorted unique tickers."""
+    symbols, mask = _listing_mask(_read_otherlisted(source, ("ACT Symbol", "Exchange")), allowed_exchanges)
+    return sorted(symbols[mask].unique().tolist())
+
+
+def fetch_nyse_tickers_symbols_only(
+    limit: Optional[int] = None,
+    session: Optional[requests.Session] = None,
+    timeout: int = 20,
+    include_exchanges: Optional[set[str]] = None,
+) -> list[str]:
+    """Return sorted unique tickers without building the name and type columns."""
+    allowed_exchanges = _normalize_filter(include_exchanges, _DEFAULT_EXCHANGES)
+    if session is None:
+        symbols = list(_cached_symbols(date.today().isoformat(), timeout, allowed_exchanges))
+    else:
+        with _open_otherlisted(session, timeout) as source:
+            symbols = _read_symbols(source, allowed_exchanges)
+
+    if limit is not None:
+        return symbols[:limit]
+    return symbols
+
+
+def clear_cache() -> None:
+    """Drop the per-process memo of listings fetched over the default transport."""
+    _cached_symbols.cache_clear()
+    _cached_nyse.cache_clear()
 
 
 def fetch_nyse_tickers_with_names(
@@ -25,33 +181,77 @@ def fetch_nyse_tickers_with_names(
     include_types: Optional[set[str]] = None,
     include_exchanges: Optional[set[str]] = None,
 ) -> pd.DataFrame:
-    client = session or requests
-    response = client.get(
-        "https://www.nasdaqtrader.com/dynamic/SymDir/otherlisted.txt",
-        timeout=timeout,
-    )
-    response.raise_for_status()
+    allowed_exchanges = _normalize_filter(include_exchanges, _DEFAULT_EXCHANGES)
+    allowed_types = _normalize_filter(include_types, _DEFAULT_TYPES)
+    if session is None:
+        return _cached_nyse(date.today().isoformat(), timeout, limit, allowed_types, allowed_exchanges).copy()
+
+    with _open_otherlisted(session, timeout) as source:
+        return _compute_nyse(_read_otherlisted(source), limit, allowed_types, allowed_exchanges)
+
+
+# Memos for the default transport. ``day`` only keys them so a long-lived process refetches daily.
+@functools.lru_cache(maxsize=8)
+def _cached_symbols(day: str, timeout: int, allowed_exchanges: frozenset[str]) -> tuple[str, ...]:
+    with _open_otherlisted(None, timeout) as source:
+        return tuple(_read_symbols(source, allowed_exchanges))
 
-    ticker_df = pd.read_csv(io.StringIO(response.text), sep="|")
-    # NYSE family: N=NYSE, P=NYSE Arca, A=NYSE American
-    allowed_exchanges = {value.upper() for value in (include_exchanges or {"N", "P", "A"})}
-    nyse = ticker_df[ticker_df["Exchange"].astype(str).str.upper().isin(allowed_exchanges)][
-        ["ACT Symbol", "Security Name", "ETF"]
-    ].copy()
-    nyse.columns = ["Ticker", "CompanyName", "ETF"]
-    nyse["Ticker"] = nyse["Ticker"].astype(str).str.strip()
-    nyse["CompanyName"] = nyse["CompanyName"].astype(str).str.strip()
-    nyse["Type"] = nyse.apply(
-        lambda row: _classify_security_type(row["ETF"], row["CompanyName"]),
-        axis=1,
-    )
-    nyse = nyse[nyse["Ticker"].str.isalpha() & (nyse["Ticker"].str.len() <= 5)]
-    allowed_types = {value.upper() for value in (include_types or {"STOCK", "ETF", "ETN", "ETC"})}
-    nyse = nyse[nyse["Type"].isin(allowed_types)]
-    nyse = nyse.drop_duplicates(subset=["Ticker"], keep="first")
-    nyse = nyse[["Ticker", "CompanyName", "Type"]]
-    nyse = nyse.sort_values("Ticker").reset_index(drop=True)
 
+@functools.lru_cache(maxsize=8)
+def _cached_nyse(
+    day: str,
+    timeout: int,
+    limit: Optional[int],
+    allowed_types: frozenset[str],
+    allowed_exchanges: frozenset[str],
+) -> pd.DataFrame:
+    with _open_otherlisted(None, timeout) as source:
+        return _compute_nyse(_read_otherlisted(source), limit, allowed_types, allowed_exchanges)
+
+
+def _compute_nyse(
+    ticker_df: pd.DataFrame,
+    limit: Optional[int],
+    allowed_types: frozenset[str],
+    allowed_exchanges: frozenset[str],
+) -> pd.DataFrame:
+    # Cut down to candidate rows first so the string work below only touches survivors.
+    symbols, mask = _listing_mask(ticker_df, allowed_exchanges)
+    # Assemble the projection from the masked columns directly; each is materialized exactly once.
+    nyse = pd.DataFrame(
+        {
+            "Ticker": symbols[mask],
+            "CompanyName": ticker_df["Security Name"][mask].str.strip(),
+            "ETF": ticker_df["ETF"][mask],
+        }
+    )
+    etf_flags = [flag for flag in nyse["ETF"].cat.categories if flag.strip().upper() == "Y"]
+    etf_mask = nyse["ETF"].isin(etf_flags)
+    if allowed_types == {"STOCK"}:
+        # Every fund row would be dropped anyway, so skip the name regexes entirely.
+        nyse = nyse[~etf_mask]
+        types = pd.Categorical.from_codes(
+            np.zeros(len(nyse), dtype=np.int8), categories=["STOCK", "ETF", "ETN", "ETC"]
+        )
+    else:
+        if "STOCK" not in allowed_types:
+            nyse = nyse[etf_mask]
+            etf_mask = etf_mask[etf_mask]
+        upper_name = nyse["CompanyName"].str.upper()
+        etn_mask = upper_name.str.contains(_ETN_RE, na=False)
+        etc_mask = upper_name.str.contains(_ETC_RE, na=False)
+        types = pd.Categorical(
+            np.where(~etf_mask, "STOCK", np.where(etn_mask, "ETN", np.where(etc_mask, "ETC", "ETF"))),
+            categories=["STOCK", "ETF", "ETN", "ETC"],
+        )
+    nyse = nyse.assign(Type=types)
+    nyse = nyse.loc[nyse["Type"].isin(allowed_types), ["Ticker", "CompanyName", "Type"]]
+    # One stable sort, then keep the first row of each ticker run: the sort doubles as the dedup.
+    tickers = nyse["Ticker"].to_numpy()
+    order = tickers.argsort(kind="stable")
+    _, first_idx = np.unique(tickers[order], return_index=True)
+    keep = order[first_idx]
     if limit is not None:
-        return nyse.head(limit).reset_index(drop=True)
-    return nyse
+        # Rows are already in final order, so truncate before taking them.
+        keep = keep[:limit]
+    return nyse.iloc[keep].reset_index(drop=True)